@@ -1,15 +1,24 @@
 import asyncio
-import json
-import csv
 import os
+import sys
 import time
 from datetime import datetime, timedelta, timezone
+import orjson
 from websockets import connect, ConnectionClosed
-from termcolor import cprint
+from termcolor import colored
 import logging
 import threading
 from collections import defaultdict
 
+# Run on uvloop's libuv-based event loop where it is available (not on Windows)
+run_event_loop = asyncio.run
+if sys.platform != 'win32':
+    try:
+        import uvloop
+        run_event_loop = uvloop.run
+    except ImportError:
+        pass
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -21,10 +30,14 @@ logger = logging.getLogger(__name__)
 symbols = ['btcusdt', 'ethusdt', 'solusdt', 'xrpusdt', 'bnbusdt', 'dogeusdt']
 # Create display names by removing 'usdt' from each symbol and capitalizing
 display_names = [symbol.replace('usdt', '').upper() for symbol in symbols]
-websocket_url_base = 'wss://fstream.binance.com/ws/'
+# Combined stream endpoint: every symbol's markPrice feed on one connection
+websocket_url = 'wss://fstream.binance.com/stream?streams=' + '/'.join(f'{symbol}@markPrice' for symbol in symbols)
+# Map each stream name in combined frames to its display name
+stream_names = {f'{symbol}@markPrice': name for symbol, name in zip(symbols, display_names)}
 
 # Shared resources
-data_lock = asyncio.Lock()
+# current_rates needs no lock: it is only touched between awaits on the
+# single event-loop thread, so coroutines never see a partial update
 csv_lock = asyncio.Lock()
 
 # Store the latest funding rates for all symbols
@@ -35,21 +48,32 @@ current_rates = {
 
 # CSV file configuration
 CSV_FILENAME = 'funding_rates.csv'
+# Persistent append handle, opened once in setup_csv_file()
+csv_fh = None
 
 # Data collection control
 COLLECTION_INTERVAL = 60  # seconds
 
+# Converts an 8-hourly funding rate to a yearly percentage (3 per day * 365 days * 100)
+YEARLY_FACTOR = 3 * 365 * 100
+
 async def setup_csv_file():
-    """Initialize the CSV file with headers if it doesn't exist."""
+    """Open the CSV file for appending, writing headers if it doesn't exist."""
+    global csv_fh
+    if csv_fh is not None:
+        return
+    
     headers = ['Time (UTC)'] + display_names
     
-    # Check if file exists and create with headers if it doesn't
-    if not os.path.exists(CSV_FILENAME):
-        async with csv_lock:
-            with open(CSV_FILENAME, 'w', newline='') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(headers)
-                logger.info(f"Created new CSV file: {CSV_FILENAME} with UTC timestamps")
+    async with csv_lock:
+        # Check if file exists before opening, and add headers if it doesn't
+        is_new = not os.path.exists(CSV_FILENAME)
+        # Rows are written a line at a time, so line buffering flushes each one.
+        # Lines end in \r\n to match what csv.writer wrote to existing files.
+        csv_fh = open(CSV_FILENAME, 'a', newline='', buffering=1)
+        if is_new:
+            csv_fh.write(','.join(headers) + '\r\n')
+            logger.info(f"Created new CSV file: {CSV_FILENAME} with UTC timestamps")
 
 async def write_to_csv(timestamp, rates):
     """Write the current funding rates to the CSV file."""
@@ -59,28 +83,18 @@ async def write_to_csv(timestamp, rates):
         return
         
     async with csv_lock:
-        with open(CSV_FILENAME, 'a', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            # Create a row with time and all funding rates
-            row = [
-                timestamp,
-                *[f"{rates[name]:.2f}%" for name in display_names]
-            ]
-            writer.writerow(row)
-            logger.info(f"Wrote to CSV: {row}")
+        # Pre-format the row with time and all funding rates
+        row = f"{timestamp}," + ",".join(f"{rates[name]:.2f}%" for name in display_names)
+        csv_fh.write(row + "\r\n")
+        logger.info(f"Wrote to CSV: {row}")
 
-async def continuous_funding_stream(symbol, display_name):
+async def continuous_funding_stream():
     """
-    Continuously monitor the funding rate for a specific symbol.
+    Continuously monitor the funding rates for all symbols over a single
+    combined WebSocket stream.
     This function runs independently of the collection timer
     and just keeps the current_rates dictionary updated.
-    
-    Args:
-        symbol (str): The trading pair symbol (e.g., 'btcusdt')
-        display_name (str): The display name for the symbol (e.g., 'BTC')
     """
-    websocket_url = f'{websocket_url_base}{symbol}@markPrice'
-    
     while True:
         try:
             logger.info(f"Connecting to {websocket_url}")
@@ -88,26 +102,29 @@ async def continuous_funding_stream(symbol, display_name):
                 while True:
                     # Continuously receive data from WebSocket
                     message = await websocket.recv()
-                    data = json.loads(message)
+                    frame = orjson.loads(message)
+                    
+                    # Combined frames wrap the payload as {"stream": ..., "data": ...}
+                    display_name = stream_names.get(frame.get('stream'))
+                    if display_name is None:
+                        continue
                     
                     # Update the current rates dictionary with this new data
-                    funding_rate = float(data['r'])
-                    yearly_funding_rate = (funding_rate * 3 * 365) * 100
+                    yearly_funding_rate = float(frame['data']['r']) * YEARLY_FACTOR
+                    
+                    current_rates[display_name] = yearly_funding_rate
                     
-                    async with data_lock:
-                        current_rates[display_name] = yearly_funding_rate
-                        
-                        # Log the update for debugging (optional)
-                        logger.debug(f"Updated {display_name} rate to {yearly_funding_rate:.2f}%")
+                    # Log the update for debugging (optional)
+                    logger.debug(f"Updated {display_name} rate to {yearly_funding_rate:.2f}%")
                     
         except ConnectionClosed as e:
-            logger.error(f"Connection closed for {symbol}: {e}")
+            logger.error(f"Connection closed for funding stream: {e}")
             await asyncio.sleep(5)
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error for {symbol}: {e}")
+        except orjson.JSONDecodeError as e:
+            logger.error(f"JSON decode error for funding stream: {e}")
             await asyncio.sleep(1)
         except Exception as e:
-            logger.error(f"Unexpected error for {symbol}: {e}")
+            logger.error(f"Unexpected error for funding stream: {e}")
             await asyncio.sleep(5)
 
 async def scheduled_data_collection():
@@ -116,55 +133,54 @@ async def scheduled_data_collection():
     This function runs separately from the WebSocket streams and just takes
     snapshots of the current_rates at regular intervals.
     """
+    last_minute = None
+    
     while True:
-        # Calculate time until the next minute starts (at :00 seconds) using UTC
-        now = datetime.now(timezone.utc)
-        # Calculate seconds until the next minute
-        seconds_to_next_minute = 60 - now.second
-        
-        if seconds_to_next_minute == 60:  # We're exactly at :00
-            seconds_to_next_minute = 0
-            
-        # Account for microseconds too, for precision
-        microseconds_to_wait = seconds_to_next_minute * 1_000_000 - now.microsecond
-        wait_time = microseconds_to_wait / 1_000_000  # Convert back to seconds (float)
+        # Sleep to the next xx:xx:00 UTC, measured from the wall clock every
+        # cycle so suspends and NTP steps correct themselves
+        wait_time = COLLECTION_INTERVAL - time.time() % COLLECTION_INTERVAL
         
         logger.info(f"Waiting {wait_time:.2f} seconds until next data collection at xx:xx:00 UTC")
         await asyncio.sleep(wait_time)
         
-        # Get the current minute for this collection cycle (xx:xx:00 format)
-        collection_time = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        # Get the minute for this collection cycle (xx:xx:00 format), rounding
+        # so a wake-up slightly before or after the boundary lands on it
+        minute = round(time.time() / COLLECTION_INTERVAL) * COLLECTION_INTERVAL
+        if minute == last_minute:
+            # Already collected this minute on an early wake-up just before it
+            continue
+        last_minute = minute
+        collection_time = datetime.fromtimestamp(minute, timezone.utc)
         collection_time_str = collection_time.strftime('%H:%M:%S')
         
-        # Take a snapshot of the current rates under the lock
-        snapshot = {}
-        async with data_lock:
-            snapshot = current_rates.copy()
-            
-            # Print the current rates to the console with color coding
-            for name, rate in snapshot.items():
-                if rate is not None:
-                    # Determine display colors based on funding rate
-                    if rate > 50:
-                        text_color, back_color = 'black', 'on_red'
-                    elif rate > 30:
-                        text_color, back_color = 'black', 'on_yellow'
-                    elif rate > 5:
-                        text_color, back_color = 'black', 'on_cyan'
-                    elif rate < -10:
-                        text_color, back_color = 'black', 'on_green'
-                    else:
-                        text_color, back_color = 'black', 'on_light_green'
-                    
-                    # Display the funding rate
-                    cprint(f'{name} funding: {rate:.2f}%', text_color, back_color)
+        # Take a snapshot of the current rates
+        snapshot = current_rates.copy()
+        
+        # Print the current rates to the console with color coding, batched
+        # into a single write so a slow terminal only blocks once per cycle
+        lines = []
+        for name, rate in snapshot.items():
+            if rate is not None:
+                # Determine display colors based on funding rate
+                if rate > 50:
+                    text_color, back_color = 'black', 'on_red'
+                elif rate > 30:
+                    text_color, back_color = 'black', 'on_yellow'
+                elif rate > 5:
+                    text_color, back_color = 'black', 'on_cyan'
+                elif rate < -10:
+                    text_color, back_color = 'black', 'on_green'
+                else:
+                    text_color, back_color = 'black', 'on_light_green'
+                
+                # Display the funding rate
+                lines.append(colored(f'{name} funding: {rate:.2f}%', text_color, back_color))
+        
+        if lines:
+            sys.stdout.write('\n'.join(lines) + '\n')
         
         # Write the snapshot to CSV
         await write_to_csv(collection_time_str, snapshot)
-        
-        # Wait until near the next minute to avoid triggering multiple times within the same minute
-        # We're aiming for exactly 60 seconds between collections, but leaving a buffer
-        await asyncio.sleep(55)
 
 async def main():
     """
@@ -175,19 +191,18 @@ async def main():
     # Initialize the CSV file
     await setup_csv_file()
     
-    # Create background tasks for continuous WebSocket streams
-    websocket_tasks = [continuous_funding_stream(symbol, display_name) 
-                       for symbol, display_name in zip(symbols, display_names)]
+    # Create the background task for the combined WebSocket stream
+    websocket_task = continuous_funding_stream()
     
     # Create the scheduled collection task
     collection_task = scheduled_data_collection()
     
     # Run all tasks concurrently
-    await asyncio.gather(collection_task, *websocket_tasks)
+    await asyncio.gather(collection_task, websocket_task)
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        run_event_loop(main())
     except KeyboardInterrupt:
         logger.info("Program terminated by user")
     except Exception as e:
@@ -1,19 +1,38 @@
 import asyncio
-import json
+import atexit
+import concurrent.futures
 import os
+import random
 import sys
 import traceback
 import time
 from datetime import datetime
-import pytz
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+import orjson
 from websockets import connect, ConnectionClosed
 from termcolor import cprint
 
+# Run on uvloop's libuv-based event loop where it is available (not on Windows)
+run_event_loop = asyncio.run
+if sys.platform != 'win32':
+    try:
+        import uvloop
+        run_event_loop = uvloop.run
+    except ImportError:
+        pass
+
 # WebSocket URL for Binance liquidation data
 websocket_url = 'wss://fstream.binance.com/ws/!forceOrder@arr'
 
 # List of tokens you want to filter for (add your preferred tokens here)
 TOKENS_TO_WATCH = ['BTC', 'ETH', 'SOL', 'XRP', 'AVAX', 'BNB']
+WATCH = frozenset(TOKENS_TO_WATCH)
+# Raw symbol fields for watched tokens, used to skip parsing irrelevant frames
+SYMBOL_MARKERS = tuple(f'"s":"{token}USDT"' for token in TOKENS_TO_WATCH)
+
+# Timezone used for the time_est column in token files
+EST = ZoneInfo('America/New_York')
 
 # Create a dedicated data directory for all files
 DATA_DIR = 'binance_liquidation_data'
@@ -48,54 +67,98 @@ for token in TOKENS_TO_WATCH:
                 'order_trade_time', 'usd_size', 'time_est'
             ]) + "\n")
 
-# Log file for tracking restarts and errors
+# Keep raw O_APPEND descriptors open for the life of the process instead of
+# re-opening the CSVs on every liquidation. flusher() joins each flush into
+# one os.write per file, so a userspace buffer on top would add nothing.
+def open_append(path):
+    """Open a file for appending as a raw OS-level descriptor"""
+    return os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+MAIN_FD = open_append(main_file)
+FILES = {
+    token: open_append(os.path.join(TOKEN_DIR, f'{token}_liquidations.csv'))
+    for token in TOKENS_TO_WATCH
+}
+
+def close_files():
+    """Close the CSV descriptors and flush and close the log handle"""
+    for fd in [MAIN_FD, *FILES.values()]:
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+    try:
+        LOG_FH.flush()
+        LOG_FH.close()
+    except Exception:
+        pass
+
+atexit.register(close_files)
+
+# Pending CSV lines as (file key, line) pairs, drained in batches by flusher().
+# Created in main() so it is bound to the running event loop.
+WRITE_Q = None
+FLUSH_BYTES = 1 << 16  # Write out once this much data is pending across all files
+FLUSH_INTERVAL = 1.0  # ...or at least this often, in seconds
+
+# Disk writes run on this thread so they never stall websocket recv. A single
+# worker keeps batches for the same file in order.
+_io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='csv-writer')
+
+# Log file for tracking restarts and errors, kept open and line-buffered so
+# each message is one write without re-opening the file
 log_file = os.path.join(DATA_DIR, 'binance_bot_log.txt')
+LOG_FH = open(log_file, 'a', buffering=1)
+
+# Last (second, formatted timestamp) used by log_message
+_last_log_time = (0, '')
 
 def log_message(message):
     """Write message to log file and print to console"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_entry = f"[{timestamp}] {message}\n"
+    global _last_log_time
+    now = int(time.time())
+    if now != _last_log_time[0]:
+        _last_log_time = (now, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)))
     
-    with open(log_file, 'a') as f:
-        f.write(log_entry)
+    LOG_FH.write(f"[{_last_log_time[1]}] {message}\n")
     
     cprint(message, 'cyan')
 
+@lru_cache(maxsize=1)
+def format_est(second):
+    """Format a unix timestamp in seconds as US/Eastern HH:MM:SS (cached, since bursts share a second)"""
+    return datetime.fromtimestamp(second, EST).strftime('%H:%M:%S')
+
 async def process_liquidation(order_data):
     """Process a single liquidation event"""
-    # Extract symbol and remove USDT suffix
+    # Binance symbols are <TOKEN>USDT, so the base token is a plain slice
     full_symbol = order_data['s']
-    symbol = full_symbol.replace('USDT', '')
-    
-    # Check if this token is in our watch list
-    base_token = None
-    for token in TOKENS_TO_WATCH:
-        if symbol.startswith(token):
-            base_token = token
-            break
+    if not full_symbol.endswith('USDT'):
+        return
     
     # Skip if not in our watch list
-    if base_token is None:
+    base_token = full_symbol[:-4]
+    if base_token not in WATCH:
         return
     
-    side = order_data['S']
-    timestamp = int(order_data['T'])
-    
     # Handle potential missing or invalid data
     try:
         filled_quantity = float(order_data['z'])
         price = float(order_data['p'])
         usd_size = filled_quantity * price
     except (KeyError, ValueError):
-        log_message(f"Warning: Invalid data in liquidation for {symbol}")
+        log_message(f"Warning: Invalid data in liquidation for {base_token}")
         return
     
+    # Most liquidations are small, so drop them before any other work
     if usd_size < 3000:
         return
+    
+    side = order_data['S']
+    timestamp = int(order_data['T'])
 
     # Format timestamp
-    est = pytz.timezone('US/Eastern')
-    time_est = datetime.fromtimestamp(timestamp / 1000, est).strftime('%H:%M:%S')
+    time_est = format_est(timestamp // 1000)
     
     # Print significant liquidations to console
 
@@ -107,40 +170,88 @@ async def process_liquidation(order_data):
     cprint(output, 'white', f'on_{color}', attrs=attrs)
     print('')
     
-    # Prepare data for CSV writing
-    msg_values = [
-        full_symbol,
-        order_data.get('S', ''),
-        order_data.get('o', ''),
-        order_data.get('f', ''),
-        order_data.get('q', ''),
-        order_data.get('p', ''),
-        order_data.get('ap', ''),
-        order_data.get('X', ''),
-        order_data.get('l', ''),
-        order_data.get('z', ''),
-        order_data.get('T', ''),
-        str(usd_size)
-    ]
+    # Format the shared CSV columns once (no newline); both files reuse them
+    g = order_data.get
+    base = (
+        f"{full_symbol},{g('S', '')},{g('o', '')},{g('f', '')},{g('q', '')},{g('p', '')},"
+        f"{g('ap', '')},{g('X', '')},{g('l', '')},{g('z', '')},{g('T', '')},{usd_size}"
+    )
     
-    # Write to main file
-    try:
-        with open(main_file, 'a') as f:
-            trade_info = ','.join(map(str, msg_values)) + '\n'
-            f.write(trade_info)
-    except Exception as e:
-        log_message(f"Error writing to main file: {str(e)}")
+    # Queue lines for the flusher instead of writing on every event
+    WRITE_Q.put_nowait(('MAIN', base + '\n'))
+    
+    # Add the formatted time for token-specific files
+    WRITE_Q.put_nowait((base_token, f"{base},{time_est}\n"))
+
+def write_buffers(bufs):
+    """Write out the pending lines for each file with a single write call"""
+    for key, lines in bufs.items():
+        if not lines:
+            continue
+        fd = MAIN_FD if key == 'MAIN' else FILES[key]
+        try:
+            data = memoryview(''.join(lines).encode())
+            # os.write can return short, so keep going until it's all out
+            while data:
+                data = data[os.write(fd, data):]
+        except Exception as e:
+            log_message(f"Error writing to {key} file: {str(e)}")
+
+def new_buffers():
+    """Empty per-file line buffers for the flusher"""
+    return {'MAIN': [], **{token: [] for token in TOKENS_TO_WATCH}}
+
+async def flusher():
+    """Drain the write queue, batching lines per file until enough data is pending or the interval elapses"""
+    loop = asyncio.get_running_loop()
+    bufs = new_buffers()
+    pending = 0
+    deadline = loop.time() + FLUSH_INTERVAL
+    # asyncio.wait() is used instead of wait_for() so cancelling the flusher
+    # can never be swallowed by a get() that completes at the same moment
+    get_task = None
     
-    # Write to token-specific file
     try:
-        token_file = os.path.join(TOKEN_DIR, f'{base_token}_liquidations.csv')
-        with open(token_file, 'a') as f:
-            # Add the formatted time for token-specific files
-            token_msg_values = msg_values + [time_est]
-            trade_info = ','.join(map(str, token_msg_values)) + '\n'
-            f.write(trade_info)
-    except Exception as e:
-        log_message(f"Error writing to token file: {str(e)}")
+        while True:
+            if get_task is None:
+                get_task = asyncio.ensure_future(WRITE_Q.get())
+            done, _ = await asyncio.wait({get_task}, timeout=max(0, deadline - loop.time()))
+            if done:
+                key, line = get_task.result()
+                get_task = None
+                bufs[key].append(line)
+                pending += len(line)
+                # Take everything else already queued so the task and timer
+                # are paid once per wakeup, not once per line
+                while not WRITE_Q.empty():
+                    key, line = WRITE_Q.get_nowait()
+                    bufs[key].append(line)
+                    pending += len(line)
+            
+            # Write out once enough is pending, or when the timer expires to
+            # bound data loss
+            expired = loop.time() >= deadline
+            if pending and (expired or pending >= FLUSH_BYTES):
+                # Hand the batch to the writer thread and start a fresh one
+                batch, bufs, pending = bufs, new_buffers(), 0
+                # Shielded so cancelling the flusher can't drop a batch the
+                # writer thread hasn't started yet
+                await asyncio.shield(loop.run_in_executor(_io_pool, write_buffers, batch))
+            if expired:
+                deadline = loop.time() + FLUSH_INTERVAL
+    finally:
+        # Don't lose queued lines when the bot restarts
+        if get_task is not None:
+            if get_task.done() and not get_task.cancelled():
+                key, line = get_task.result()
+                bufs[key].append(line)
+            else:
+                get_task.cancel()
+        while not WRITE_Q.empty():
+            key, line = WRITE_Q.get_nowait()
+            bufs[key].append(line)
+        # Queue behind any batch still being written so order is kept
+        _io_pool.submit(write_buffers, bufs).result()
 
 async def binance_liquidation(uri):
     """Connect to Binance websocket and process liquidation events"""
@@ -157,13 +268,16 @@ async def binance_liquidation(uri):
                 while True:
                     try:
                         msg = await websocket.recv()
-                        data = json.loads(msg)
+                        # Most frames are for other symbols; skip them before parsing
+                        if not any(marker in msg for marker in SYMBOL_MARKERS):
+                            continue
+                        data = orjson.loads(msg)
                         if 'o' in data:
                             await process_liquidation(data['o'])
                     except ConnectionClosed:
                         log_message("WebSocket connection closed unexpectedly. Reconnecting...")
                         break
-                    except json.JSONDecodeError:
+                    except orjson.JSONDecodeError:
                         log_message(f"Error decoding JSON: {msg[:100]}...")
                         continue
                     except Exception as e:
@@ -175,7 +289,7 @@ async def binance_liquidation(uri):
             log_message(f"Reconnecting in {backoff} seconds...")
             
             # Implement exponential backoff with jitter
-            await asyncio.sleep(backoff + (0.1 * backoff * (asyncio.get_event_loop().time() % 1)))
+            await asyncio.sleep(backoff * random.uniform(1.0, 1.1))
             backoff = min(backoff * 2, max_backoff)  # Double backoff time, but cap it
 
 async def heartbeat():
@@ -192,6 +306,10 @@ async def main():
     """Main function to run the bot with auto-restart capabilities"""
     log_message("Starting Binance Liquidation Bot")
     
+    global WRITE_Q
+    WRITE_Q = asyncio.Queue()
+    flush_task = asyncio.create_task(flusher())
+    
     try:
         # Run heartbeat and main tasks concurrently
         await asyncio.gather(
@@ -204,13 +322,16 @@ async def main():
         log_message("Restarting entire bot in 5 seconds...")
         await asyncio.sleep(5)
         # Instead of restarting here, we'll let the outer loop handle it
+    finally:
+        flush_task.cancel()
+        await asyncio.gather(flush_task, return_exceptions=True)
 
 if __name__ == "__main__":
     # Outer loop to ensure the bot always restarts
     while True:
         try:
             # Check for keyboard interrupt cleanly
-            asyncio.run(main())
+            run_event_loop(main())
         except KeyboardInterrupt:
             log_message("Script terminated by keyboard interrupt. Exiting...")
             sys.exit(0)
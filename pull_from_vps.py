@@ -1,31 +1,68 @@
+import shutil
+import subprocess
 import paramiko
 
 # VPS Connection Details
 VPS_HOST = "89.116.34.94"  # Your VPS IP
 VPS_USERNAME = "root"       # Your VPS user
-VPS_PASSWORD = "your-password"  # Avoid plaintext passwords, use SSH keys instead
+VPS_PASSWORD = "your-password"  # Only used by the paramiko fallback; prefer SSH keys
 REMOTE_PATH = "/root/my_project/myfile.py"  # File on VPS
 LOCAL_PATH = "/Users/your-user/Downloads/myfile.py"  # Where to save it on your PC
 
-def download_file():
-    try:
-        # Initialize SSH client
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+# Paramiko fallback tuning
+SFTP_WINDOW_SIZE = 64 * 1024 * 1024
+SFTP_MAX_PACKET_SIZE = 256 * 1024
+COPY_CHUNK_SIZE = 1 << 20
+
+def download_with_scp():
+    # OpenSSH's scp uses native crypto (AES-NI) and large windows, so it is much
+    # faster than paramiko's pure-Python SFTP. Auth comes from ssh-agent/keys;
+    # BatchMode makes it fail instead of prompting when no key is accepted.
+    subprocess.run([
+        'scp', '-o', 'BatchMode=yes', '-o', 'StrictHostKeyChecking=accept-new',
+        f'{VPS_USERNAME}@{VPS_HOST}:{REMOTE_PATH}', LOCAL_PATH
+    ], check=True)
+
+def download_with_paramiko():
+    # Initialize SSH client
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+
+    # Connect to VPS
+    ssh.connect(VPS_HOST, username=VPS_USERNAME, password=VPS_PASSWORD)
 
-        # Connect to VPS
-        ssh.connect(VPS_HOST, username=VPS_USERNAME, password=VPS_PASSWORD)
+    # Start SFTP session with a larger window and packet size than paramiko's
+    # defaults (2 MiB / 32 KiB), which otherwise cap throughput on high-latency links
+    sftp = paramiko.SFTPClient.from_transport(
+        ssh.get_transport(),
+        window_size=SFTP_WINDOW_SIZE,
+        max_packet_size=SFTP_MAX_PACKET_SIZE
+    )
 
-        # Start SFTP session
-        sftp = ssh.open_sftp()
+    # Download file, prefetching reads ahead and copying in large chunks
+    with sftp.open(REMOTE_PATH, 'rb') as remote, open(LOCAL_PATH, 'wb') as local:
+        remote.prefetch()
+        shutil.copyfileobj(remote, local, COPY_CHUNK_SIZE)
 
-        # Download file
+    # Close connections
+    sftp.close()
+    ssh.close()
+
+def download_file():
+    try:
         print(f"Downloading {REMOTE_PATH} from VPS to {LOCAL_PATH}...")
-        sftp.get(REMOTE_PATH, LOCAL_PATH)
 
-        # Close connections
-        sftp.close()
-        ssh.close()
+        # Prefer the system scp client. Fall back to paramiko where scp isn't
+        # installed or fails, e.g. when only password auth is set up
+        if shutil.which('scp'):
+            try:
+                download_with_scp()
+            except subprocess.CalledProcessError as e:
+                print(f"scp failed ({e}), retrying with paramiko...")
+                download_with_paramiko()
+        else:
+            download_with_paramiko()
+
         print("Download complete!")
 
     except Exception as e: